@@ -12,14 +12,20 @@ SCREEN_DISTANCE = 2.0  # Virtual screen distance in meters
 # Sensor Configuration
 SERIAL_PORT = '/dev/tty.usbserial-0001'
 SERIAL_BAUDRATE = 115200
+SERIAL_READ_TIMEOUT = 0.05  # Seconds a read waits for the first byte
 SENSOR_FILTER_ALPHA = 0.05
 
 # Performance Settings
 TARGET_FPS = 240
 CAPTURE_FPS = 240
 RENDER_FPS = 90
-FRAME_BUFFER_SIZE = 2
+FRAME_RING_SLOTS = 3  # Preallocated frames shared between capture, render and display (minimum 3)
 ORIENTATION_THRESHOLD = 0.5  # Degrees
+MAP_CACHE_SIZE = 32  # Cached orientations on the CPU path, ~5.5 MB of fixed-point maps each
+CUDA_MAP_CACHE_SIZE = 16  # Cached orientations on the CUDA path, ~7.4 MB of float32 GpuMats (VRAM) each
+RELATIVE_DISTORTION_MAPS = False  # Displacement maps via WARP_RELATIVE_MAP (OpenCV >= 4.10)
+USE_OPENGL = True  # Shader renderer via moderngl, falls back to remap if unavailable
+USE_CUDA = True  # Only used when OpenCV is built with CUDA and a device is present
 
 # UI Settings
 CURSOR_SIZE = 5
@@ -2,7 +2,6 @@
 import numpy as np
 import cv2
 import time
-import queue
 import mss
 import Quartz
 from threading import Thread
@@ -10,12 +9,14 @@ from threading import Thread
 class ScreenCapture:
     """Handles screen capture and cursor overlay for VR display"""
     
-    def __init__(self, config, frame_buffer):
+    def __init__(self, config, frame_ring):
         self.config = config
-        self.frame_buffer = frame_buffer
+        self.frame_ring = frame_ring
         self.running = True
         self.screen_width = None
         self.screen_height = None
+        # Frames stay in the captured BGRA layout, so flip the RGB cursor colour and make it opaque
+        self.cursor_color = (*reversed(config.CURSOR_COLOR), 255)
         self.initialize_screen_dimensions()
     
     def initialize_screen_dimensions(self):
@@ -35,11 +36,11 @@ class ScreenCapture:
         # Scale cursor position from screen resolution to capture resolution
         x = int(x * (self.config.CAPTURE_WIDTH / self.screen_width))
         y = int(y * (self.config.CAPTURE_HEIGHT / self.screen_height))
-        cv2.circle(frame, (x, y), self.config.CURSOR_SIZE, self.config.CURSOR_COLOR, -1)
+        cv2.circle(frame, (x, y), self.config.CURSOR_SIZE, self.cursor_color, -1)
         return frame
     
     def capture_screen(self):
-        """Main capture loop - grabs screen, processes, and queues frames"""
+        """Main capture loop - grabs screen and processes it straight into the frame ring"""
         with mss.mss() as sct:
             monitor = sct.monitors[1]  # Primary monitor
             
@@ -50,37 +51,36 @@ class ScreenCapture:
                 "height": self.screen_height
             }
             
+            capture_size = (self.config.CAPTURE_WIDTH, self.config.CAPTURE_HEIGHT)
+            
+            # Frames are paced against a running monotonic deadline so timing error doesn't accumulate
+            period = 1 / self.config.CAPTURE_FPS
+            next_deadline = time.perf_counter() + period
+            
             while self.running:
-                start_time = time.time()
-                
-                # Capture screen
+                # Capture screen and wrap the raw BGRA bytes without copying
                 img = sct.grab(capture_region)
-                frame = np.array(img)
-                
-                # Downscale for performance
-                frame = cv2.resize(frame, (self.config.CAPTURE_WIDTH, self.config.CAPTURE_HEIGHT))
+                bgra = np.frombuffer(img.raw, dtype=np.uint8).reshape(img.height, img.width, 4)
                 
-                # Convert BGRA to RGB for display
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2RGB)
+                # Downscale for performance, directly into the next ring slot - kept as BGRA
+                # since the display swizzles channels while blitting
+                frame = self.frame_ring.write_slot()
+                cv2.resize(bgra, capture_size, dst=frame, interpolation=cv2.INTER_AREA)
                 
                 # Add cursor overlay
                 mouse_x, mouse_y = self.get_mouse_position()
-                frame = self.overlay_cursor(frame, mouse_x, mouse_y)
+                self.overlay_cursor(frame, mouse_x, mouse_y)
                 
-                # Queue management - replace oldest frame if buffer is full
-                try:
-                    self.frame_buffer.put_nowait(frame)
-                except queue.Full:
-                    try:
-                        self.frame_buffer.get_nowait()  # Remove oldest
-                        self.frame_buffer.put_nowait(frame)  # Add new
-                    except queue.Empty:
-                        pass
+                self.frame_ring.publish()
                 
                 # Maintain target FPS
-                frame_duration = time.time() - start_time
-                target_sleep = max(0, 1/self.config.CAPTURE_FPS - frame_duration)
-                time.sleep(target_sleep)
+                now = time.perf_counter()
+                if next_deadline > now:
+                    time.sleep(next_deadline - now)
+                elif now - next_deadline > period:
+                    # Fell more than a frame behind - resync rather than bursting to catch up
+                    next_deadline = now
+                next_deadline += period
     
     def start(self):
         """Start capture thread"""
@@ -0,0 +1,103 @@
+# processing/gl_renderer.py
+import numpy as np
+import math
+from utils.math_utils import create_rotation_matrix
+
+try:
+    import moderngl
+except ImportError:
+    moderngl = None
+
+VERTEX_SHADER = """
+#version 330
+in vec2 position;
+void main() {
+    gl_Position = vec4(position, 0.0, 1.0);
+}
+"""
+
+# Per-pixel equivalent of the remap path: build the eye ray, rotate, project and sample the frame
+FRAGMENT_SHADER = """
+#version 330
+uniform sampler2D frame;
+uniform mat3 rotation;
+uniform vec2 frame_size;
+uniform vec2 eye_size;
+uniform vec2 output_scale;
+uniform float half_ipd;
+uniform float focal_length;
+out vec4 color;
+
+void main() {
+    vec2 pixel = gl_FragCoord.xy * output_scale - 0.5;
+    float side = -1.0;
+    if (pixel.x >= eye_size.x) {
+        side = 1.0;
+        pixel.x -= eye_size.x;
+    }
+
+    vec3 ray = vec3(pixel.x - eye_size.x * 0.5 + side * half_ipd, pixel.y - eye_size.y * 0.5, focal_length);
+    vec3 rotated = rotation * ray;
+    vec2 source = rotated.xy / rotated.z * focal_length + eye_size * 0.5;
+
+    // Points behind the viewer or outside the frame render black, like BORDER_CONSTANT
+    if (rotated.z <= 0.0 || any(lessThan(source, vec2(-0.5))) || any(greaterThan(source, frame_size - 0.5))) {
+        color = vec4(0.0);
+        return;
+    }
+    color = texture(frame, (source + 0.5) / frame_size);
+}
+"""
+
+class GLVRProcessor:
+    """Renders the stereo VR view with an OpenGL fragment shader instead of distortion maps"""
+
+    def __init__(self, config):
+        if moderngl is None:
+            raise RuntimeError("moderngl is not installed")
+        self.config = config
+        self.ctx = None
+
+        self.target_width = config.CAPTURE_WIDTH // 2
+        self.target_height = config.CAPTURE_HEIGHT
+        self.focal_length = (self.target_width / 2) / math.tan(math.radians(config.FOV_DEGREES) / 2)
+        self.half_ipd = config.IPD * self.focal_length / (config.SCREEN_DISTANCE * 1000) / 2
+
+    def initialize_gl(self):
+        """Create the GL context and resources - must run on the rendering thread"""
+        self.ctx = moderngl.create_standalone_context()
+        self.program = self.ctx.program(vertex_shader=VERTEX_SHADER, fragment_shader=FRAGMENT_SHADER)
+
+        quad = np.array([-1, -1, 1, -1, -1, 1, 1, 1], dtype='f4')
+        self.vao = self.ctx.vertex_array(self.program, self.ctx.buffer(quad.tobytes()), 'position')
+
+        # BGRA bytes are uploaded and read back unchanged, so no channel swizzle is needed on the GPU
+        self.texture = self.ctx.texture((self.config.CAPTURE_WIDTH, self.config.CAPTURE_HEIGHT), 4)
+        self.texture.filter = (moderngl.LINEAR, moderngl.LINEAR)
+        self.texture.repeat_x = False
+        self.texture.repeat_y = False
+
+        # Render straight at display resolution so no CPU resize is needed afterwards
+        output_width, output_height = self.config.WIDTH, self.config.HEIGHT // 2
+        self.fbo = self.ctx.simple_framebuffer((output_width, output_height), components=4)
+
+        self.program['frame_size'].value = (self.config.CAPTURE_WIDTH, self.config.CAPTURE_HEIGHT)
+        self.program['eye_size'].value = (self.target_width, self.target_height)
+        self.program['output_scale'].value = (self.target_width * 2 / output_width, self.target_height / output_height)
+        self.program['half_ipd'].value = self.half_ipd
+        self.program['focal_length'].value = self.focal_length
+
+    def render_frame(self, frame, yaw, pitch, roll, output):
+        """Render a frame with VR distortion for both eyes into the display-sized output"""
+        if self.ctx is None:
+            self.initialize_gl()
+
+        # GLSL matrices are column-major, so upload the transpose
+        rotation_matrix = create_rotation_matrix(yaw, pitch, roll)
+        self.program['rotation'].write(np.ascontiguousarray(rotation_matrix.T, dtype='f4').tobytes())
+        self.texture.write(frame)
+
+        self.fbo.use()
+        self.texture.use(0)
+        self.vao.render(moderngl.TRIANGLE_STRIP)
+        self.fbo.read_into(output, components=4)
@@ -2,68 +2,109 @@
 import numpy as np
 import cv2
 import math
-from numba import jit
+from functools import lru_cache
+from numba import njit, prange, types
 from utils.math_utils import create_rotation_matrix
 
-@jit(nopython=True)
-def compute_vr_distortion(x_flat, y_flat, z_flat, half_ipd, focal_length, target_width, target_height, 
-                          rot_matrix, img_height, img_width):
-    """Compute distortion maps for VR rendering using JIT compilation for performance"""
-    size = len(x_flat)
-    left_rotated_x = np.zeros(size)
-    left_rotated_y = np.zeros(size)
-    left_rotated_z = np.zeros(size)
-    
-    # Left eye transformation with IPD offset
-    for i in range(size):
-        x_with_ipd = x_flat[i] - half_ipd
-        left_rotated_x[i] = x_with_ipd * rot_matrix[0, 0] + y_flat[i] * rot_matrix[0, 1] + z_flat[i] * rot_matrix[0, 2]
-        left_rotated_y[i] = x_with_ipd * rot_matrix[1, 0] + y_flat[i] * rot_matrix[1, 1] + z_flat[i] * rot_matrix[1, 2]
-        left_rotated_z[i] = x_with_ipd * rot_matrix[2, 0] + y_flat[i] * rot_matrix[2, 1] + z_flat[i] * rot_matrix[2, 2]
-    
-    left_screen_x = np.full(size, -1.0)
-    left_screen_y = np.full(size, -1.0)
-    
-    # Project points to screen coordinates (perspective projection)
-    for i in range(size):
-        if left_rotated_z[i] > 0:
-            left_screen_x[i] = (left_rotated_x[i] / left_rotated_z[i] * focal_length) + target_width / 2
-            left_screen_y[i] = (left_rotated_y[i] / left_rotated_z[i] * focal_length) + target_height / 2
-    
-    left_map_x = left_screen_x.reshape(img_height, img_width)
-    left_map_y = left_screen_y.reshape(img_height, img_width)
-    
-    right_rotated_x = np.zeros(size)
-    right_rotated_y = np.zeros(size)
-    right_rotated_z = np.zeros(size)
-    
-    # Right eye transformation with opposite IPD offset
-    for i in range(size):
-        x_with_ipd = x_flat[i] + half_ipd
-        right_rotated_x[i] = x_with_ipd * rot_matrix[0, 0] + y_flat[i] * rot_matrix[0, 1] + z_flat[i] * rot_matrix[0, 2]
-        right_rotated_y[i] = x_with_ipd * rot_matrix[1, 0] + y_flat[i] * rot_matrix[1, 1] + z_flat[i] * rot_matrix[1, 2]
-        right_rotated_z[i] = x_with_ipd * rot_matrix[2, 0] + y_flat[i] * rot_matrix[2, 1] + z_flat[i] * rot_matrix[2, 2]
-    
-    right_screen_x = np.full(size, -1.0)
-    right_screen_y = np.full(size, -1.0)
-    
-    for i in range(size):
-        if right_rotated_z[i] > 0:
-            right_screen_x[i] = (right_rotated_x[i] / right_rotated_z[i] * focal_length) + target_width / 2
-            right_screen_y[i] = (right_rotated_y[i] / right_rotated_z[i] * focal_length) + target_height / 2
-    
-    right_map_x = right_screen_x.reshape(img_height, img_width)
-    right_map_y = right_screen_y.reshape(img_height, img_width)
+# Everything stays float32 end to end - cv2.remap/convertMaps never use more precision
+flat_vector = types.float32[::1]
+distortion_map = types.float32[:, ::1]
+rotation_matrix_type = types.Array(types.float32, 2, 'C', readonly=True)
+
+distortion_signature = types.void(flat_vector, flat_vector, flat_vector,
+                                  types.float32, types.float32, types.float32, types.float32,
+                                  rotation_matrix_type, distortion_map, distortion_map, distortion_map, distortion_map)
+
+def compute_vr_distortion(x_flat, y_flat, z_flat, half_ipd, focal_length, target_width, target_height,
+                          rot_matrix, left_map_x, left_map_y, right_map_x, right_map_y):
+    """Compute both eyes' distortion maps in one fused, multi-threaded pass into the given outputs"""
+    img_height, img_width = left_map_x.shape
+    center_x = target_width * np.float32(0.5)
+    center_y = target_height * np.float32(0.5)
     
-    return left_map_x, left_map_y, right_map_x, right_map_y
+    # The projection is always evaluated and points behind the viewer are selected out
+    # afterwards, so the loop has no data-dependent branch and vectorizes to a blend
+    for row in prange(img_height):
+        for col in range(img_width):
+            i = row * img_width + col
+            
+            # y/z contribution to the rotation is shared by both eyes, only x carries the IPD offset
+            shared_x = y_flat[i] * rot_matrix[0, 1] + z_flat[i] * rot_matrix[0, 2]
+            shared_y = y_flat[i] * rot_matrix[1, 1] + z_flat[i] * rot_matrix[1, 2]
+            shared_z = y_flat[i] * rot_matrix[2, 1] + z_flat[i] * rot_matrix[2, 2]
+            
+            # Left eye
+            x_with_ipd = x_flat[i] - half_ipd
+            rotated_x = x_with_ipd * rot_matrix[0, 0] + shared_x
+            rotated_y = x_with_ipd * rot_matrix[1, 0] + shared_y
+            rotated_z = x_with_ipd * rot_matrix[2, 0] + shared_z
+            scale = focal_length / rotated_z
+            in_front = rotated_z > 0
+            left_map_x[row, col] = rotated_x * scale + center_x if in_front else np.float32(-1.0)
+            left_map_y[row, col] = rotated_y * scale + center_y if in_front else np.float32(-1.0)
+            
+            # Right eye with opposite IPD offset
+            x_with_ipd = x_flat[i] + half_ipd
+            rotated_x = x_with_ipd * rot_matrix[0, 0] + shared_x
+            rotated_y = x_with_ipd * rot_matrix[1, 0] + shared_y
+            rotated_z = x_with_ipd * rot_matrix[2, 0] + shared_z
+            scale = focal_length / rotated_z
+            in_front = rotated_z > 0
+            right_map_x[row, col] = rotated_x * scale + center_x if in_front else np.float32(-1.0)
+            right_map_y[row, col] = rotated_y * scale + center_y if in_front else np.float32(-1.0)
+
+def compile_distortion_kernel():
+    """JIT-compile compute_vr_distortion for float32 - done on first use so a failure can fall back"""
+    return njit(distortion_signature, parallel=True, fastmath=True, cache=True,
+                error_model='numpy')(compute_vr_distortion)
+
+def cuda_available():
+    """Check whether OpenCV was built with CUDA and a device is present"""
+    try:
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except (AttributeError, cv2.error):
+        return False
 
 class VRProcessor:
     def __init__(self, config):
         self.config = config
         self.precompute_vr_parameters()
-        self.map_cache = {}
-        self.last_orientation = None
+        self.distortion_kernel = None
+        self.use_jit = True
+        self.use_cuda = config.USE_CUDA and cuda_available()
+        
+        # Maps keyed on orientation quantized to ORIENTATION_THRESHOLD steps, so small
+        # oscillations (tremor, sensor noise) keep hitting recently computed maps.
+        # GPU entries hold float maps and cost more (VRAM), so they get their own size
+        cache_size = config.CUDA_MAP_CACHE_SIZE if self.use_cuda else config.MAP_CACHE_SIZE
+        self.map_cache = lru_cache(maxsize=cache_size)(self.compute_quantized_maps)
+        self.initialize_frame_buffers()
+        
+        # Relative maps store per-pixel displacements instead of absolute source coordinates
+        self.use_relative_maps = config.RELATIVE_DISTORTION_MAPS and hasattr(cv2, 'WARP_RELATIVE_MAP')
+        self.remap_interpolation = cv2.INTER_LINEAR
+        if self.use_relative_maps:
+            self.remap_interpolation |= cv2.WARP_RELATIVE_MAP
+        
+        if self.use_cuda:
+            self.initialize_cuda_buffers()
         
+    def initialize_frame_buffers(self):
+        """Allocate the side-by-side frame used when the output needs resizing"""
+        self.output_size = (self.config.WIDTH, self.config.HEIGHT//2)
+        self.needs_resize = self.output_size != (self.target_width * 2, self.target_height)
+        
+        # Eyes are composed here first when the display resolution differs from the capture
+        self.combined = np.empty((self.target_height, self.target_width * 2, 4), dtype=np.uint8)
+    
+    def initialize_cuda_buffers(self):
+        """Allocate persistent GPU buffers; each eye renders into its half of the combined frame"""
+        self.cuda_stream = cv2.cuda_Stream()
+        self.gpu_frame = cv2.cuda_GpuMat()
+        self.gpu_combined = cv2.cuda_GpuMat(self.target_height, self.target_width * 2, cv2.CV_8UC4)
+        self.gpu_left = cv2.cuda_GpuMat(self.gpu_combined, (0, 0, self.target_width, self.target_height))
+        self.gpu_right = cv2.cuda_GpuMat(self.gpu_combined, (self.target_width, 0, self.target_width, self.target_height))
+    
     def precompute_vr_parameters(self):
         """Pre-compute fixed VR parameters for performance"""
         self.target_width = self.config.CAPTURE_WIDTH // 2
@@ -75,107 +116,157 @@ class VRProcessor:
         # Convert IPD from mm to pixels
         self.half_ipd = self.config.IPD * self.focal_length / (self.config.SCREEN_DISTANCE * 1000) / 2
         
-        # Create coordinate grids for distortion mapping
-        y_grid, x_grid = np.mgrid[0:self.target_height, 0:self.target_width]
-        self.x_centered = x_grid - self.target_width / 2
-        self.y_centered = y_grid - self.target_height / 2
-        self.z_values = np.ones_like(x_grid) * self.focal_length
+        # Centred pixel coordinates, built directly as float32 rows/columns
+        xs = np.arange(self.target_width, dtype=np.float32) - self.target_width / 2
+        ys = np.arange(self.target_height, dtype=np.float32) - self.target_height / 2
         
         # Flatten for vectorized operations
-        self.x_flat = self.x_centered.flatten()
-        self.y_flat = self.y_centered.flatten()
-        self.z_flat = self.z_values.flatten()
-    
-    def should_use_cache(self, current_orientation):
-        if self.last_orientation is None:
-            return False
-        diff = np.abs(np.array(current_orientation) - np.array(self.last_orientation))
-        return np.all(diff < self.config.ORIENTATION_THRESHOLD)
-    
-    def compute_distortion_maps(self, yaw, pitch, roll):
-        current_orientation = (yaw, pitch, roll)
+        self.x_flat = np.broadcast_to(xs, (self.target_height, self.target_width)).ravel().copy()
+        self.y_flat = np.repeat(ys, self.target_width)
+        self.z_flat = np.full(self.x_flat.shape, self.focal_length, dtype=np.float32)
         
-        # Use cached maps if orientation hasn't changed significantly
-        if self.should_use_cache(current_orientation) and self.map_cache:
-            return self.map_cache
+        # Non-JIT fallback buffers, only built if the JIT kernel fails
+        self.left_pts = None
+        self.right_pts = None
         
-        rotation_matrix = create_rotation_matrix(yaw, pitch, roll)
+        # Destination pixel indices, subtracted out when building relative maps
+        self.pixel_cols = np.arange(self.target_width, dtype=np.float32)
+        self.pixel_rows = np.arange(self.target_height, dtype=np.float32)[:, np.newaxis]
         
-        try:
-            maps = compute_vr_distortion(
-                self.x_flat, self.y_flat, self.z_flat, 
-                self.half_ipd, self.focal_length, 
-                self.target_width, self.target_height,
-                rotation_matrix, 
-                self.target_height, self.target_width
-            )
-        except Exception as e:
-            print(f"Error in distortion calculation: {e}")
-            # Fallback to non-JIT version if JIT compilation fails
-            maps = self.compute_vr_distortion_fallback(yaw, pitch, roll)
-        
-        self.map_cache = maps
-        self.last_orientation = current_orientation
-        return maps
+        # Float distortion maps, rewritten in place on every refresh
+        map_shape = (self.target_height, self.target_width)
+        self.left_map_x = np.empty(map_shape, dtype=np.float32)
+        self.left_map_y = np.empty(map_shape, dtype=np.float32)
+        self.right_map_x = np.empty(map_shape, dtype=np.float32)
+        self.right_map_y = np.empty(map_shape, dtype=np.float32)
     
-    def compute_vr_distortion_fallback(self, yaw, pitch, roll):
-        """Non-JIT fallback implementation for compatibility"""
-        rotation_matrix = create_rotation_matrix(yaw, pitch, roll)
+    def initialize_fallback_buffers(self):
+        """Allocate the per-eye rays and scratch buffers used by the non-JIT fallback"""
+        # Per-eye base rays - only x differs by the IPD offset
+        self.left_pts = self.build_eye_points(-self.half_ipd)
+        self.right_pts = self.build_eye_points(self.half_ipd)
         
-        # Left eye
-        left_coords = np.zeros((len(self.x_flat), 3))
-        left_coords[:, 0] = self.x_flat - self.half_ipd
-        left_coords[:, 1] = self.y_flat
-        left_coords[:, 2] = self.z_flat
-        
-        left_rotated = left_coords @ rotation_matrix.T
-        
-        valid_indices = left_rotated[:, 2] > 0
-        left_screen_x = np.full(left_rotated.shape[0], -1.0)
-        left_screen_y = np.full(left_rotated.shape[0], -1.0)
-        
-        left_screen_x[valid_indices] = (left_rotated[valid_indices, 0] / left_rotated[valid_indices, 2] * self.focal_length) + self.target_width / 2
-        left_screen_y[valid_indices] = (left_rotated[valid_indices, 1] / left_rotated[valid_indices, 2] * self.focal_length) + self.target_height / 2
-        
-        left_map_x = left_screen_x.reshape(self.target_height, self.target_width)
-        left_map_y = left_screen_y.reshape(self.target_height, self.target_width)
+        # Scratch buffers reused by the fallback projection step
+        size = len(self.x_flat)
+        self._valid = np.empty(size, dtype=bool)
+        self._scale = np.empty(size, dtype=np.float32)
+        self._rotated = np.empty((size, 3), dtype=np.float32)
+    
+    def build_eye_points(self, ipd_offset):
+        """Fill an (N, 3) float32 ray buffer for one eye, offset along x by the IPD"""
+        pts = np.empty((len(self.x_flat), 3), dtype=np.float32)
+        np.add(self.x_flat, ipd_offset, out=pts[:, 0])
+        pts[:, 1] = self.y_flat
+        pts[:, 2] = self.z_flat
+        return pts
+    
+    def compute_distortion_maps(self, yaw, pitch, roll):
+        step = self.config.ORIENTATION_THRESHOLD
+        return self.map_cache(round(yaw / step), round(pitch / step), round(roll / step))
+    
+    def compute_quantized_maps(self, yaw_steps, pitch_steps, roll_steps):
+        """Compute remap-ready maps for a quantized orientation (cached by map_cache)"""
+        step = self.config.ORIENTATION_THRESHOLD
+        yaw, pitch, roll = yaw_steps * step, pitch_steps * step, roll_steps * step
         
-        # Right eye
-        right_coords = np.zeros((len(self.x_flat), 3))
-        right_coords[:, 0] = self.x_flat + self.half_ipd
-        right_coords[:, 1] = self.y_flat
-        right_coords[:, 2] = self.z_flat
+        rotation_matrix = create_rotation_matrix(yaw, pitch, roll)
         
-        right_rotated = right_coords @ rotation_matrix.T
+        eye_maps = (self.left_map_x, self.left_map_y, self.right_map_x, self.right_map_y)
         
-        valid_indices = right_rotated[:, 2] > 0
-        right_screen_x = np.full(right_rotated.shape[0], -1.0)
-        right_screen_y = np.full(right_rotated.shape[0], -1.0)
+        if self.use_jit:
+            try:
+                if self.distortion_kernel is None:
+                    self.distortion_kernel = compile_distortion_kernel()
+                self.distortion_kernel(
+                    self.x_flat, self.y_flat, self.z_flat, 
+                    np.float32(self.half_ipd), np.float32(self.focal_length), 
+                    np.float32(self.target_width), np.float32(self.target_height),
+                    rotation_matrix.astype(np.float32, copy=False), *eye_maps
+                )
+            except Exception as e:
+                print(f"Error in distortion calculation, using non-JIT fallback: {e}")
+                self.use_jit = False
         
-        right_screen_x[valid_indices] = (right_rotated[valid_indices, 0] / right_rotated[valid_indices, 2] * self.focal_length) + self.target_width / 2
-        right_screen_y[valid_indices] = (right_rotated[valid_indices, 1] / right_rotated[valid_indices, 2] * self.focal_length) + self.target_height / 2
+        # Fallback to non-JIT version if JIT compilation or the kernel fails
+        if not self.use_jit:
+            self.compute_vr_distortion_fallback(rotation_matrix, *eye_maps)
         
-        right_map_x = right_screen_x.reshape(self.target_height, self.target_width)
-        right_map_y = right_screen_y.reshape(self.target_height, self.target_width)
+        if self.use_cuda:
+            # cuda::remap only takes float maps - upload them once per refresh
+            maps = tuple(cv2.cuda_GpuMat(eye_map) for eye_map in eye_maps)
+        else:
+            if self.use_relative_maps:
+                for map_x, map_y in ((self.left_map_x, self.left_map_y), (self.right_map_x, self.right_map_y)):
+                    np.subtract(map_x, self.pixel_cols, out=map_x)
+                    np.subtract(map_y, self.pixel_rows, out=map_y)
+            
+            # Convert once to fixed-point maps so remap reads packed 16-bit XY per frame
+            left_xy, left_interp = cv2.convertMaps(self.left_map_x, self.left_map_y, cv2.CV_16SC2)
+            right_xy, right_interp = cv2.convertMaps(self.right_map_x, self.right_map_y, cv2.CV_16SC2)
+            maps = (left_xy, left_interp, right_xy, right_interp)
+            
+            # Cached maps are shared between frames, so guard them against in-place edits
+            for fixed_map in maps:
+                fixed_map.flags.writeable = False
         
-        return left_map_x, left_map_y, right_map_x, right_map_y
+        return maps
     
-    def render_frame(self, frame, yaw, pitch, roll):
-        """Render a frame with VR distortion for both eyes"""
-        left_map_x, left_map_y, right_map_x, right_map_y = self.compute_distortion_maps(yaw, pitch, roll)
+    def compute_vr_distortion_fallback(self, rotation_matrix, left_map_x, left_map_y, right_map_x, right_map_y):
+        """Non-JIT fallback implementation for compatibility"""
+        if self.left_pts is None:
+            self.initialize_fallback_buffers()
+        rotation_matrix = rotation_matrix.astype(np.float32, copy=False)
+        self.compute_eye_maps(self.left_pts, rotation_matrix, left_map_x, left_map_y)
+        self.compute_eye_maps(self.right_pts, rotation_matrix, right_map_x, right_map_y)
+    
+    def compute_eye_maps(self, pts, rotation_matrix, map_x, map_y):
+        """Rotate one eye's base rays and project them to screen coordinates (perspective projection)"""
+        # Rotate every ray (pts @ R.T) directly into the preallocated buffer
+        rotated = np.matmul(pts, rotation_matrix.T, out=self._rotated)
+        z = rotated[:, 2]
+        valid = np.greater(z, 0, out=self._valid)
+        np.divide(self.focal_length, z, out=self._scale, where=valid)
         
-        # Apply distortion maps using OpenCV's remap
-        left_eye = cv2.remap(frame, left_map_x.astype(np.float32), left_map_y.astype(np.float32), 
-                        cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        # Points behind the viewer map to -1 so remap fills them with the border colour
+        for axis, offset, screen in ((0, self.target_width / 2, map_x.reshape(-1)),
+                                     (1, self.target_height / 2, map_y.reshape(-1))):
+            screen.fill(-1.0)
+            np.multiply(rotated[:, axis], self._scale, out=screen, where=valid)
+            np.add(screen, offset, out=screen, where=valid)
+    
+    def render_frame(self, frame, yaw, pitch, roll, output):
+        """Render a frame with VR distortion for both eyes into the display-sized output"""
+        maps = self.compute_distortion_maps(yaw, pitch, roll)
         
-        right_eye = cv2.remap(frame, right_map_x.astype(np.float32), right_map_y.astype(np.float32), 
-                            cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+        combined_frame = self.combined if self.needs_resize else output
         
-        # Combine eyes side by side
-        combined_frame = np.hstack((left_eye, right_eye))
+        if self.use_cuda:
+            self.remap_eyes_cuda(frame, maps, combined_frame)
+        else:
+            left_xy, left_interp, right_xy, right_interp = maps
+            
+            # Apply fixed-point distortion maps, each eye straight into its half of the frame
+            cv2.remap(frame, left_xy, left_interp, self.remap_interpolation,
+                      dst=combined_frame[:, :self.target_width],
+                      borderMode=cv2.BORDER_CONSTANT, borderValue=0)
+            
+            cv2.remap(frame, right_xy, right_interp, self.remap_interpolation,
+                      dst=combined_frame[:, self.target_width:],
+                      borderMode=cv2.BORDER_CONSTANT, borderValue=0)
         
         # Resize to target display resolution if needed
-        if combined_frame.shape[1] != self.config.WIDTH or combined_frame.shape[0] != self.config.HEIGHT//2:
-            combined_frame = cv2.resize(combined_frame, (self.config.WIDTH, self.config.HEIGHT//2))
+        if self.needs_resize:
+            cv2.resize(combined_frame, self.output_size, dst=output)
+    
+    def remap_eyes_cuda(self, frame, maps, combined_frame):
+        """Remap both eyes on the GPU and download the side-by-side result into combined_frame"""
+        left_map_x, left_map_y, right_map_x, right_map_y = maps
+        
+        self.gpu_frame.upload(frame, self.cuda_stream)
+        cv2.cuda.remap(self.gpu_frame, left_map_x, left_map_y, cv2.INTER_LINEAR, dst=self.gpu_left,
+                       borderMode=cv2.BORDER_CONSTANT, stream=self.cuda_stream)
+        cv2.cuda.remap(self.gpu_frame, right_map_x, right_map_y, cv2.INTER_LINEAR, dst=self.gpu_right,
+                       borderMode=cv2.BORDER_CONSTANT, stream=self.cuda_stream)
         
-        return combined_frame
\ No newline at end of file
+        self.gpu_combined.download(self.cuda_stream, combined_frame)
+        self.cuda_stream.waitForCompletion()
@@ -1,24 +1,65 @@
 # sensors/reader.py
 import serial
 import time
-import re
-import queue
+import math
 from threading import Thread
 
 class SensorReader:
     """Reads orientation data from MPU sensor via serial connection"""
     
-    def __init__(self, config, sensor_queue):
+    def __init__(self, config, sensor_fusion):
         self.config = config
-        self.sensor_queue = sensor_queue
+        self.sensor_fusion = sensor_fusion
         self.running = True
-        # Regex pattern to extract yaw, pitch, roll values from serial data
-        self.pattern = r"Yaw:\s*([-\d.]+),\s*Pitch:\s*([-\d.]+),\s*Roll:\s*([-\d.]+)"
+        # Field labels expected in each "Yaw: <v>, Pitch: <v>, Roll: <v>" line
+        self.labels = ("Yaw", "Pitch", "Roll")
+        # Characters allowed in a value, matching the sensor's "[-\d.]+" number format
+        self.value_chars = frozenset("-0123456789.")
+    
+    def parse_orientation(self, line):
+        """Split a sensor line into (yaw, pitch, roll) floats, or None if it is malformed"""
+        # Anything after the Roll field (extra fields, units) is ignored, as the old regex did
+        parts = line.split(',', 3)
+        if len(parts) < 3:
+            return None
+        
+        values = []
+        for part, label in zip(parts, self.labels):
+            name, _, value = part.partition(':')
+            value = value.strip()
+            if label == "Roll":
+                # Only the leading number of the last field counts, e.g. "Roll: 3.0 deg"
+                end = 0
+                while end < len(value) and value[end] in self.value_chars:
+                    end += 1
+                value = value[:end]
+            if not name.endswith(label) or not value or not self.value_chars.issuperset(value):
+                return None
+            try:
+                number = float(value)
+            except ValueError:
+                return None
+            # Overlong digit strings overflow to inf, which would poison the low-pass filters
+            if not math.isfinite(number):
+                return None
+            values.append(number)
+        return values
+    
+    def handle_line(self, raw_line):
+        """Parse one complete serial line and hand its values to sensor fusion"""
+        line = raw_line.decode('utf-8', errors='replace').strip()
+        orientation = self.parse_orientation(line)
+        
+        if orientation:
+            # Extract orientation values
+            yaw, pitch, roll = orientation
+            self.sensor_fusion.update(yaw, pitch, roll)
     
     def sensor_reader(self):
-        """Main sensor reading loop - parses serial data and queues sensor values"""
+        """Main sensor reading loop - reads serial data in bulk and dispatches complete lines"""
         try:
-            ser = serial.Serial(self.config.SERIAL_PORT, self.config.SERIAL_BAUDRATE, timeout=1)
+            ser = serial.Serial(self.config.SERIAL_PORT, self.config.SERIAL_BAUDRATE,
+                                timeout=self.config.SERIAL_READ_TIMEOUT)
             # Clear any existing data in buffers
             ser.reset_input_buffer()
             ser.reset_output_buffer()
@@ -26,33 +67,19 @@ class SensorReader:
             time.sleep(2)  # Allow serial connection to stabilize
             print("Serial connection established, waiting for sensor data...")
             
+            rx_buffer = bytearray()
             while self.running:
-                if ser.in_waiting > 0:
-                    raw_line = ser.readline()
-                    
-                    if raw_line:
-                        line = raw_line.decode('utf-8', errors='replace').strip()
-                        match = re.search(self.pattern, line)
-                        
-                        if match:
-                            # Extract orientation values
-                            yaw = float(match.group(1))
-                            pitch = float(match.group(2))
-                            roll = float(match.group(3))
-                            
-                            # Queue sensor data with timestamp
-                            try:
-                                self.sensor_queue.put_nowait({
-                                    "yaw": yaw,
-                                    "pitch": pitch,
-                                    "roll": roll,
-                                    "timestamp": time.time()
-                                })
-                            except queue.Full:
-                                # Skip if queue is full to prevent blocking
-                                pass
+                # Block for at least one byte (up to the timeout), then take everything pending
+                chunk = ser.read(max(1, ser.in_waiting))
+                if not chunk:
+                    continue
+                rx_buffer += chunk
                 
-                time.sleep(0.001)  # Prevent CPU overload
+                newline = rx_buffer.find(b'\n')
+                while newline >= 0:
+                    self.handle_line(bytes(rx_buffer[:newline]))
+                    del rx_buffer[:newline + 1]
+                    newline = rx_buffer.find(b'\n')
         
         except Exception as e:
             print(f"Error in sensor reading thread: {e}")
@@ -4,14 +4,15 @@ from PIL import Image, ImageTk
 import numpy as np
 import cv2
 import time
-import queue
 from threading import Thread
 
 import config
 from processing.capture import ScreenCapture
 from processing.vr_distortion import VRProcessor
+from processing.gl_renderer import GLVRProcessor
 from sensors.reader import SensorReader
 from sensors.fusion import SensorFusion
+from utils.frame_ring import FrameRing
 
 class VRDisplayApp:
     """Main VR display application - orchestrates capture, processing, and rendering"""
@@ -36,31 +37,57 @@ class VRDisplayApp:
             highlightthickness=0
         )
         self.canvas.pack(fill='both', expand=True)
+        
+        # Persistent image and FPS items - frames are pasted in place rather than recreated
+        self.frame_size = (config.WIDTH, config.HEIGHT//2)
+        self.photo = ImageTk.PhotoImage('RGB', self.frame_size)
+        self.canvas_image_id = self.canvas.create_image(
+            config.WIDTH//2,
+            config.HEIGHT//2,
+            image=self.photo,
+            anchor='center'
+        )
+        self.fps_text_id = self.canvas.create_text(
+            100, 50,
+            text="",
+            fill=config.FPS_TEXT_COLOR,
+            font=config.FPS_TEXT_FONT
+        )
 
         self.running = True
-        self.frame_buffer = queue.Queue(maxsize=config.FRAME_BUFFER_SIZE)
-        self.render_buffer = queue.Queue(maxsize=config.FRAME_BUFFER_SIZE)
+        # Lock-free rings of preallocated frames: capture -> render -> display
+        self.frame_ring = FrameRing((config.CAPTURE_HEIGHT, config.CAPTURE_WIDTH, 4), config.FRAME_RING_SLOTS)
+        self.render_ring = FrameRing((config.HEIGHT//2, config.WIDTH, 4), config.FRAME_RING_SLOTS)
+        self.displayed_head = 0
         
         # FPS tracking
-        self.last_fps_check = time.time()
+        self.last_fps_check = time.perf_counter()
         self.frame_count = 0
         self.fps = 0
-        
-        self.sensor_queue = queue.Queue(maxsize=10)
+        self.display_period_ms = int(1000 / config.RENDER_FPS)
         
         self.initialize_components()
         self.start_threads()
-        self.start_process_sensor_loop()
         self.update_display()
+        self.root.after(1000, self.update_fps)
         
         self.root.bind('<Escape>', lambda e: self.quit_app())
     
     def initialize_components(self):
         """Initialize all processing components"""
-        self.screen_capture = ScreenCapture(self.config, self.frame_buffer)
-        self.vr_processor = VRProcessor(self.config)
-        self.sensor_reader = SensorReader(self.config, self.sensor_queue)
-        self.sensor_fusion = SensorFusion(self.config, self.sensor_queue)
+        self.screen_capture = ScreenCapture(self.config, self.frame_ring)
+        self.vr_processor = self.create_vr_processor()
+        self.sensor_fusion = SensorFusion(self.config)
+        self.sensor_reader = SensorReader(self.config, self.sensor_fusion)
+    
+    def create_vr_processor(self):
+        """Prefer the OpenGL shader renderer, falling back to distortion-map remapping"""
+        if self.config.USE_OPENGL:
+            try:
+                return GLVRProcessor(self.config)
+            except RuntimeError as e:
+                print(f"OpenGL renderer unavailable, using remap: {e}")
+        return VRProcessor(self.config)
     
     def start_threads(self):
         """Start capture and render threads"""
@@ -71,93 +98,64 @@ class VRDisplayApp:
         self.render_thread.daemon = True
         self.render_thread.start()
     
-    def start_process_sensor_loop(self):
-        """Process sensor data on main thread with timer"""
-        self.sensor_fusion.process_sensor_data()
-        if self.running:
-            self.root.after(2, self.start_process_sensor_loop)
-
     def render_frame_thread(self):
         """Background thread for VR frame rendering"""
+        rendered_head = 0
         while self.running:
-            # Skip if render buffer is full
-            if self.render_buffer.full():
-                time.sleep(0.001)
+            # Backpressure - don't render ahead of a display that hasn't taken the last frame
+            if self.render_ring.pending():
+                self.render_ring.wait_for_consumer(timeout=0.1)
                 continue
-                
-            try:
-                if not self.frame_buffer.empty():
-                    frame = self.frame_buffer.get_nowait()
-                    
-                    # Get current orientation with calibration offsets
-                    sensor_data = self.sensor_fusion.get_sensor_data()
-                    yaw = sensor_data.get("yaw", 0.0) + 100
-                    pitch = sensor_data.get("pitch", 0.0) + 12
-                    roll = sensor_data.get("roll", 0.0)
-                    
-                    combined_frame = self.vr_processor.render_frame(frame, yaw, pitch, roll)
-                    
-                    # Queue management for rendered frames
-                    try:
-                        self.render_buffer.put_nowait(combined_frame)
-                    except queue.Full:
-                        try:
-                            self.render_buffer.get_nowait()  # Remove oldest
-                            self.render_buffer.put_nowait(combined_frame)
-                        except queue.Empty:
-                            pass
-            except queue.Empty:
-                time.sleep(0.001)
+            
+            head, frame = self.frame_ring.acquire()
+            
+            # Wait for capture to signal a new frame (the timeout keeps shutdown responsive)
+            if head == rendered_head:
+                self.frame_ring.wait_for_frame(timeout=0.1)
                 continue
+            rendered_head = head
+            
+            # Get current orientation with calibration offsets
+            yaw, pitch, roll = self.sensor_fusion.get_orientation()
+            yaw += 100
+            pitch += 12
             
-            time.sleep(0.001)
+            output = self.render_ring.write_slot()
+            try:
+                self.vr_processor.render_frame(frame, yaw, pitch, roll, output)
+            except Exception as e:
+                # GL context/shader setup only happens on the first render - fall back to remap
+                if not isinstance(self.vr_processor, GLVRProcessor):
+                    raise
+                print(f"OpenGL renderer unavailable, using remap: {e}")
+                self.vr_processor = VRProcessor(self.config)
+                self.vr_processor.render_frame(frame, yaw, pitch, roll, output)
+            self.render_ring.publish()
 
     def update_display(self):
-        """Update UI with rendered VR frames and FPS counter"""
-        start_time = time.time()
+        """Show the freshest rendered VR frame on a fixed RENDER_FPS schedule"""
+        head, combined_frame = self.render_ring.acquire()
         
-        try:
-            if not self.render_buffer.empty():
-                combined_frame = self.render_buffer.get_nowait()
-                
-                image = Image.fromarray(combined_frame)
-                photo = ImageTk.PhotoImage(image=image)
-                
-                self.canvas.delete("all")
-                self.canvas.create_image(
-                    config.WIDTH//2,
-                    config.HEIGHT//2,
-                    image=photo,
-                    anchor='center'
-                )
-                # Keep reference to prevent garbage collection
-                self.canvas.image = photo
-                
-                # FPS calculation and display
-                self.frame_count += 1
-                now = time.time()
-                if now - self.last_fps_check >= 1.0:
-                    self.fps = self.frame_count / (now - self.last_fps_check)
-                    print(f"FPS: {self.fps:.1f}")
-                    self.last_fps_check = now
-                    self.frame_count = 0
-                    
-                    self.canvas.create_text(
-                        100, 50, 
-                        text=f"FPS: {self.fps:.1f}", 
-                        fill=config.FPS_TEXT_COLOR, 
-                        font=config.FPS_TEXT_FONT
-                    )
-                
-        except queue.Empty:
-            pass
+        if head != self.displayed_head:
+            self.displayed_head = head
+            # Frames are BGRA end to end - PIL swizzles to RGB while unpacking
+            image = Image.frombuffer('RGB', self.frame_size, combined_frame, 'raw', 'BGRX', 0, 1)
+            self.photo.paste(image)
+            self.frame_count += 1
         
-        # Dynamic scheduling based on render time
-        process_time = time.time() - start_time
-        next_update = max(1, int(1000/config.RENDER_FPS - process_time * 1000))
+        if self.running:
+            self.root.after(self.display_period_ms, self.update_display)
+    
+    def update_fps(self):
+        """Refresh the on-screen FPS counter once per second"""
+        now = time.perf_counter()
+        self.fps = self.frame_count / (now - self.last_fps_check)
+        self.last_fps_check = now
+        self.frame_count = 0
+        self.canvas.itemconfig(self.fps_text_id, text=f"FPS: {self.fps:.1f}")
         
         if self.running:
-            self.root.after(next_update, self.update_display)
+            self.root.after(1000, self.update_fps)
 
     def quit_app(self):
         """Clean shutdown of all components"""
@@ -0,0 +1,74 @@
+# utils/frame_ring.py
+import numpy as np
+from threading import Event
+from multiprocessing.sharedctypes import RawValue
+
+class FrameRing:
+    """Single-producer/single-consumer triple buffer of preallocated frame slots.
+
+    The producer fills write_slot() in place and calls publish(); the consumer takes the
+    newest frame with acquire() without locks or copies. The consumer advertises the slot
+    it is reading and write_slot() never hands out that slot or the latest published one,
+    so a frame is never overwritten while it is being read. The head counter only ever
+    increases, so a consumer can tell a new frame from one it has already seen.
+    """
+    
+    def __init__(self, shape, slots=3):
+        # The producer needs a free slot besides the latest one and the one being read
+        if slots < 3:
+            raise ValueError(f"FrameRing needs at least 3 slots, got {slots}")
+        self.slots = [np.empty(shape, dtype=np.uint8) for _ in range(slots)]
+        self.head = RawValue('q', 0)  # Number of frames published so far
+        self.latest_index = RawValue('i', -1)  # Slot holding the newest published frame
+        self.reading_index = RawValue('i', -1)  # Slot the consumer is currently reading
+        self.consumed_head = RawValue('q', 0)  # Head of the frame the consumer last acquired
+        self.write_index = 0
+        self.published = Event()
+        self.consumed = Event()
+    
+    def write_slot(self):
+        """Slot the producer should fill next - never the latest or the one being read"""
+        busy = (self.latest_index.value, self.reading_index.value)
+        self.write_index = next(i for i in range(len(self.slots)) if i not in busy)
+        return self.slots[self.write_index]
+    
+    def publish(self):
+        """Make the slot returned by write_slot() the latest frame"""
+        self.latest_index.value = self.write_index
+        self.head.value += 1
+        self.published.set()
+    
+    def wait_for_frame(self, timeout):
+        """Block until a frame is published or the timeout expires"""
+        self.published.wait(timeout)
+        self.published.clear()
+    
+    def acquire(self):
+        """Return (head, frame) for the newest frame and protect it until the next acquire().
+
+        frame is None before the first publish.
+        """
+        head = self.head.value
+        if head == 0:
+            return head, None
+        
+        # Re-check after advertising the slot: if nothing was published in between, the
+        # producer's current write slot was chosen while this slot was latest, so it differs
+        while True:
+            index = self.latest_index.value
+            self.reading_index.value = index
+            if self.latest_index.value == index:
+                break
+        
+        self.consumed_head.value = head
+        self.consumed.set()
+        return head, self.slots[index]
+    
+    def pending(self):
+        """True while the consumer has not yet acquired the newest published frame"""
+        return self.head.value != self.consumed_head.value
+    
+    def wait_for_consumer(self, timeout):
+        """Block until the consumer acquires a frame or the timeout expires"""
+        self.consumed.wait(timeout)
+        self.consumed.clear()
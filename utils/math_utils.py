@@ -1,28 +1,40 @@
 # utils/math_utils.py
 import numpy as np
 import math
+from functools import lru_cache
+
+ROTATION_STEP = 0.25  # Degrees - orientations are quantized to this before building a matrix
 
 def create_rotation_matrix(yaw, pitch, roll):
-    yaw_rad = math.radians(yaw)
-    pitch_rad = math.radians(pitch)
-    roll_rad = math.radians(roll)
-    
-    rot_yaw = np.array([
-        [math.cos(yaw_rad), 0, math.sin(yaw_rad)],
-        [0, 1, 0],
-        [-math.sin(yaw_rad), 0, math.cos(yaw_rad)]
-    ])
-    
-    rot_pitch = np.array([
-        [1, 0, 0],
-        [0, math.cos(pitch_rad), -math.sin(pitch_rad)],
-        [0, math.sin(pitch_rad), math.cos(pitch_rad)]
-    ])
-    
-    rot_roll = np.array([
-        [math.cos(roll_rad), -math.sin(roll_rad), 0],
-        [math.sin(roll_rad), math.cos(roll_rad), 0],
-        [0, 0, 1]
-    ])
-    
-    return rot_yaw @ rot_pitch @ rot_roll
\ No newline at end of file
+    """Return yaw @ pitch @ roll as a read-only float32 matrix, cached on quantized angles"""
+    return _rotation_matrix(
+        round(yaw / ROTATION_STEP),
+        round(pitch / ROTATION_STEP),
+        round(roll / ROTATION_STEP)
+    )
+
+@lru_cache(maxsize=256)
+def _rotation_matrix(yaw_steps, pitch_steps, roll_steps):
+    yaw_rad = math.radians(yaw_steps * ROTATION_STEP)
+    pitch_rad = math.radians(pitch_steps * ROTATION_STEP)
+    roll_rad = math.radians(roll_steps * ROTATION_STEP)
+
+    cy, sy = math.cos(yaw_rad), math.sin(yaw_rad)
+    cp, sp = math.cos(pitch_rad), math.sin(pitch_rad)
+    cr, sr = math.cos(roll_rad), math.sin(roll_rad)
+
+    # Expanded product of the yaw (y-axis), pitch (x-axis) and roll (z-axis) rotations
+    rot = np.empty((3, 3), dtype=np.float32)
+    rot[0, 0] = cy * cr + sy * sp * sr
+    rot[0, 1] = -cy * sr + sy * sp * cr
+    rot[0, 2] = sy * cp
+    rot[1, 0] = cp * sr
+    rot[1, 1] = cp * cr
+    rot[1, 2] = -sp
+    rot[2, 0] = -sy * cr + cy * sp * sr
+    rot[2, 1] = sy * sr + cy * sp * cr
+    rot[2, 2] = cy * cp
+
+    # Shared between callers through the cache
+    rot.flags.writeable = False
+    return rot